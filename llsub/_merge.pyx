@@ -0,0 +1,50 @@
+# cython: language_level=3
+"""
+Compiled version of the line interleaving used when merging subtitles.
+The pure Python fallback in llsub.py must be kept in sync with this module.
+"""
+
+
+def interleave(list original_lines, list translated_lines) -> list:
+    """
+    Interleave the original and translated lines of every event.
+
+    :param original_lines: A list containing the original lines of each event.
+    :param translated_lines: A list containing the translated lines of each event.
+    :return: A list containing the merged text of each event.
+    """
+    cdef Py_ssize_t event_count = len(original_lines)
+    cdef Py_ssize_t i, j
+    cdef list merged_texts = []
+    cdef list event_original_lines, event_translated_lines, parts
+    cdef str line
+
+    if len(translated_lines) != event_count:
+        raise ValueError("Both subtitle files must have the same number of events.")
+
+    for i in range(event_count):
+        event_original_lines = original_lines[i]
+        event_translated_lines = translated_lines[i]
+
+        # Check if the number of lines is the same in both texts
+        if len(event_original_lines) == len(event_translated_lines):
+            # If the line count is matched, interleave the lines. Note that
+            # pysubs2 won't generate the extra line break with a \n only,
+            # which is why we use \r\n here
+            parts = []
+            for j in range(len(event_original_lines)):
+                parts.append(event_original_lines[j])
+                parts.append("\n(")
+                parts.append(event_translated_lines[j])
+                parts.append(")\r\n\r\n")
+            merged_texts.append("".join(parts))
+        else:
+            # If the line count is mismatched, list original lines first,
+            # then translated lines. \r\n is required for the extra line break.
+            merged_texts.append(
+                "\n".join(event_original_lines)
+                + "\r\n\r\n"
+                + "\n".join([f"({line})" for line in event_translated_lines])
+            )
+
+    return merged_texts
@@ -1,14 +1,37 @@
 #!/usr/bin/env python3
 
 import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
+import io
+import json
 import logging
 import os
 import re
+import sqlite3
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
 
+import aiohttp
 import pysubs2
 import tqdm
-from deep_translator import GoogleTranslator
+from pysubs2.time import TIMESTAMP, timestamp_to_ms
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+# pysubs2 1.7 moved the subtitle formats into the pysubs2.formats package
+try:
+    from pysubs2.formats.subrip import SubripFormat
+except ImportError:
+    from pysubs2.subrip import SubripFormat
 
 # Set up logging configuration
 logging.basicConfig(
@@ -18,18 +41,595 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Endpoint used by the Google Translate web widget. It accepts multiple q
+# parameters and returns one translation for each of them. Google throttles
+# clients at roughly 5 requests per second.
+GOOGLE_TRANSLATE_URL = "https://translate.googleapis.com/translate_a/t"
+MAX_CONCURRENT_REQUESTS = 5
+# Minimum delay between the start of consecutive requests, to stay under the
+# rate limit
+REQUEST_DELAY = 0.2
+# Stands in for \N line breaks during translation. It is a private use
+# character, so Google leaves it alone and it cannot appear in real dialogue.
+LINE_BREAK_MARKER = "\ue000"
+
+# Translations are cached across runs, since re-running a file (or translating
+# other episodes of the same show) often repeats previously translated text
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "llsub", "tm.sqlite")
+# SQLite limits the number of parameters that can be used in a single query
+MAX_QUERY_PARAMETERS = 500
+
+# Matches a line containing at least two timestamps, including the line break.
+# Like pysubs2, any line with exactly two timestamps is a timing line, whether
+# or not they are separated by an arrow.
+SRT_TIMING_LINE = re.compile(
+    r"^[^\n]*?(\d{1,2}):(\d{1,2}):(\d{1,2})[.,](\d{1,3})"
+    r"[^\n]*?(\d{1,2}):(\d{1,2}):(\d{1,2})[.,](\d{1,3})[^\n]*\n?",
+    re.MULTILINE,
+)
+SRT_TIMING_LINE_TIMESTAMPS = 2
+# Matches the number of the next entry at the end of an entry's text
+SRT_NEXT_ENTRY_NUMBER = re.compile(r"\n+ *\d+ *$")
+# HTML tags converted to SubStation tags when loading, the same as pysubs2
+SRT_HTML_TAGS = [
+    (re.compile(r"< *i *>"), r"{\\i1}"),
+    (re.compile(r"< */ *i *>"), r"{\\i0}"),
+    (re.compile(r"< *s *>"), r"{\\s1}"),
+    (re.compile(r"< */ *s *>"), r"{\\s0}"),
+    (re.compile(r"< *u *>"), r"{\\u1}"),
+    (re.compile(r"< */ *u *>"), r"{\\u0}"),
+    (re.compile(r"< *b *>"), r"{\\b1}"),
+    (re.compile(r"< */ *b *>"), r"{\\b0}"),
+]
+# Matches any other HTML tag, which is removed when loading
+SRT_UNKNOWN_HTML_TAG = re.compile(r"< */? *[a-zA-Z][^>]*>")
+# Matches the number line at the start of an SRT entry
+SRT_ENTRY_NUMBER = re.compile(r"^\d+\n(?=\d+:\d\d:\d\d,\d\d\d --> )", re.MULTILINE)
+# Suffix of the sidecar file used to detect changes to merged subtitles
+MANIFEST_SUFFIX = ".llsub-manifest.json"
+
+
+def _is_rate_limited(exception: BaseException) -> bool:
+    """
+    Check whether a request failed because of the rate limit.
+
+    :param exception: The exception raised by the request.
+    :return: True if the server responded with 429 Too Many Requests.
+    """
+    return (
+        isinstance(exception, aiohttp.ClientResponseError)
+        and exception.status == HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+class RequestLimiter:
+    def __init__(self, max_concurrent: int, delay: float):
+        """
+        Initialize a RequestLimiter, which limits the number of concurrent
+        requests and spaces out the start of each request.
+
+        :param max_concurrent: The maximum number of requests in flight at once.
+        :param delay: The minimum delay between the start of two requests.
+        """
+        self.delay = delay
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    @classmethod
+    def shared(cls, jobs: int) -> "RequestLimiter":
+        """
+        Create a RequestLimiter for one of several jobs that translate at the
+        same time. Each job gets an equal share of the request budget, so that
+        together they stay under the rate limit.
+
+        :param jobs: The number of jobs sharing the request budget.
+        :return: A RequestLimiter object.
+        """
+        return cls(max(1, MAX_CONCURRENT_REQUESTS // jobs), REQUEST_DELAY * jobs)
+
+    async def __aenter__(self) -> "RequestLimiter":
+        await self._sem.acquire()
+        try:
+            # Only the scheduling happens under the lock; the request itself
+            # is sent after the lock is released
+            async with self._lock:
+                now = asyncio.get_running_loop().time()
+                if self._next_start > now:
+                    await asyncio.sleep(self._next_start - now)
+                    now = self._next_start
+                self._next_start = now + self.delay
+        except BaseException:
+            self._sem.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._sem.release()
+
+
+# Back off exponentially when rate limited, rather than losing all progress
+@retry(
+    wait=wait_exponential(multiplier=1, max=60),
+    retry=retry_if_exception(_is_rate_limited),
+    stop=stop_after_attempt(6),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+async def _translate_batch(
+    session: aiohttp.ClientSession,
+    limiter: RequestLimiter,
+    texts: list,
+    src: str,
+    tgt: str,
+) -> list:
+    """
+    Translate a batch of texts in a single request to the Google Translate
+    endpoint. Each text is sent as a separate q parameter.
+
+    :param session: The aiohttp session used to make the request.
+    :param limiter: RequestLimiter shared by all concurrent requests.
+    :param texts: A list of texts to translate.
+    :param src: The source language identifier.
+    :param tgt: The target language identifier.
+    :return: A list of translated texts, in the same order as texts.
+    """
+    # format=text asks for the translations as plain text, rather than with
+    # HTML special characters escaped
+    params = {"client": "gtx", "sl": src, "tl": tgt, "format": "text"}
+
+    async with limiter:
+        # The texts are sent in the request body, since a full batch of
+        # percent-encoded text is too long to fit in a URL
+        async with session.post(
+            GOOGLE_TRANSLATE_URL,
+            params=params,
+            data=[("q", text) for text in texts],
+        ) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+
+    # The response contains one translation for each q parameter. A single
+    # translation may be returned on its own, and each translation may be
+    # a [text, detected_language] pair instead of a string.
+    if isinstance(data, str):
+        data = [data]
+    translated_texts = [
+        translation[0] if isinstance(translation, list) else translation
+        for translation in data
+    ]
+
+    if len(translated_texts) != len(texts):
+        raise ValueError(
+            "Translation returned a different number of events than "
+            "were sent; cannot match translated events."
+        )
+
+    return translated_texts
+
+
+async def _gather_translations(
+    batches: list, src: str, tgt: str, on_translated=None, jobs: int = 1
+) -> list:
+    """
+    Translate a list of batches concurrently, preserving their order.
+
+    :param batches: A list of batches, each containing a list of texts.
+    :param src: The source language identifier.
+    :param tgt: The target language identifier.
+    :param on_translated: Optional callback, called with each translated batch
+                          in order, as soon as it is available.
+    :param jobs: The number of jobs translating at the same time, which share
+                 the request budget.
+    :return: A list of translated batches.
+    """
+    limiter = RequestLimiter.shared(jobs)
+
+    async with aiohttp.ClientSession() as session:
+        tasks = [
+            asyncio.create_task(_translate_batch(session, limiter, batch, src, tgt))
+            for batch in batches
+        ]
+        translated_batches = []
+
+        try:
+            # The requests run concurrently, but are awaited in order so that
+            # the results can be handled in order
+            for task in tqdm.tqdm(tasks, desc="Translating subtitles"):
+                translated_batch = await task
+                translated_batches.append(translated_batch)
+                if on_translated is not None:
+                    on_translated(translated_batch)
+        finally:
+            # Cancel any outstanding requests if a translation failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    return translated_batches
+
+
+def _interleave(original_lines: list, translated_lines: list) -> list:
+    """
+    Interleave the original and translated lines of every event. This is the
+    pure Python version of llsub/_merge.pyx, used when the compiled extension
+    is not available.
+
+    :param original_lines: A list containing the original lines of each event.
+    :param translated_lines: A list containing the translated lines of each event.
+    :return: A list containing the merged text of each event.
+    """
+    merged_texts = []
+    for event_original_lines, event_translated_lines in zip(
+        original_lines, translated_lines, strict=True
+    ):
+        # Check if the number of lines is the same in both texts
+        if len(event_original_lines) == len(event_translated_lines):
+            # If the line count is matched, interleave the lines. The parts
+            # are collected in a list and joined once at the end.
+            parts = []
+            append = parts.append
+            for original_line, translated_line in zip(
+                event_original_lines, event_translated_lines, strict=True
+            ):
+                # Note that pysubs2 won't generate the extra line break with a \n
+                # only, which is why we use \r\n here
+                append(original_line)
+                append("\n(")
+                append(translated_line)
+                append(")\r\n\r\n")
+            merged_texts.append("".join(parts))
+        else:
+            # If the line count is mismatched, list original lines first,
+            # then translated lines. \r\n is required for the extra line break.
+            merged_texts.append(
+                "\n".join(event_original_lines)
+                + "\r\n\r\n"
+                + "\n".join([f"({line})" for line in event_translated_lines])
+            )
+
+    return merged_texts
+
+
+# Use the compiled version of the merge loop if it was built
+try:
+    from ._merge import interleave
+except ImportError:
+    interleave = _interleave
+
+
+def _parse_srt(file_path: str) -> tuple:
+    """
+    Parse an SRT file in a single pass. The text of each entry is converted
+    the same way pysubs2 converts it, without the overhead of pysubs2's
+    general purpose loader.
+
+    :param file_path: The path to the SRT file.
+    :return: A tuple of three lists, containing the start times (in ms), end
+             times (in ms) and text of each entry.
+    """
+    with open(file_path, encoding="utf-8") as fp:
+        content = fp.read()
+
+    starts = []
+    ends = []
+    texts = []
+
+    # Lines with more than two timestamps are text, the same as in pysubs2
+    timing_lines = [
+        timing_line
+        for timing_line in SRT_TIMING_LINE.finditer(content)
+        if len(TIMESTAMP.findall(timing_line.group())) == SRT_TIMING_LINE_TIMESTAMPS
+    ]
+    for i, timing_line in enumerate(timing_lines):
+        starts.append(timestamp_to_ms(timing_line.group(1, 2, 3, 4)))
+        ends.append(timestamp_to_ms(timing_line.group(5, 6, 7, 8)))
+
+        # The text runs until the timing line of the next entry
+        text_end = (
+            timing_lines[i + 1].start() if i + 1 < len(timing_lines) else len(content)
+        )
+        texts.append(_prepare_srt_text(content[timing_line.end() : text_end]))
+
+    return starts, ends, texts
+
+
+def _prepare_srt_text(text: str) -> str:
+    """
+    Convert the text of an SRT entry to SubStation text, the same as pysubs2.
+
+    :param text: The text following the timing line of the entry, which may
+                 include the number of the next entry.
+    :return: The converted text.
+    """
+    # An entry without any text is directly followed by the number of the
+    # next entry
+    lines = text.split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    if (
+        len(lines) > 1
+        and all(not line.strip() for line in lines[:-1])
+        and lines[-1].strip().isdecimal()
+    ):
+        return ""
+
+    text = SRT_NEXT_ENTRY_NUMBER.sub("", text.strip())
+    if "<" in text:
+        for tag, replacement in SRT_HTML_TAGS:
+            text = tag.sub(replacement, text)
+        text = SRT_UNKNOWN_HTML_TAG.sub("", text)
+
+    return text.replace("\n", "\\N")
+
+
+class SRTWriter:
+    def __init__(self, fp: io.TextIOBase):
+        """
+        Initialize an SRTWriter, which writes events to an SRT file
+        incrementally.
+
+        :param fp: The open file to write the SRT entries to.
+        """
+        self.fp = fp
+        self.line_number = 1
+
+    @staticmethod
+    def format_event(event: pysubs2.SSAEvent) -> str:
+        """
+        Format an event as an SRT entry, without the entry number.
+
+        :param event: The SSAEvent to format.
+        :return: The SRT entry, or an empty string if the event cannot be
+                 represented in SRT.
+        """
+        # pysubs2 is used to convert the event, so the output is the same
+        # as saving the whole file at once
+        subs = pysubs2.SSAFile()
+        subs.events = [event]
+        buffer = io.StringIO()
+        SubripFormat.to_file(subs, buffer, "srt")
+        entry = buffer.getvalue()
+
+        # pysubs2 always numbers the entry as 1, so remove the number
+        return entry[entry.index("\n") + 1 :] if entry else ""
+
+    @staticmethod
+    def format_events(events: list) -> list:
+        """
+        Format a list of events as SRT entries, without the entry numbers.
+        This is the same as calling format_event() for each event, but the
+        events are converted together, which is much faster.
+
+        :param events: A list of SSAEvent objects.
+        :return: A list containing the SRT entry of each event, or an empty
+                 string for any event that cannot be represented in SRT.
+        """
+        # pysubs2 skips comments and drawings without leaving a gap in the
+        # numbering, so these events are formatted on their own
+        convertible = [
+            not event.is_comment and "\\p" not in event.text for event in events
+        ]
+        subs = pysubs2.SSAFile()
+        subs.events = [
+            event
+            for event, is_convertible in zip(events, convertible, strict=True)
+            if is_convertible
+        ]
+        buffer = io.StringIO()
+        SubripFormat.to_file(subs, buffer, "srt")
+        entries = SRT_ENTRY_NUMBER.split(buffer.getvalue())[1:]
+
+        # The text of an event could look like the start of another entry, in
+        # which case the entries cannot be told apart
+        if len(entries) != len(subs.events):
+            return [SRTWriter.format_event(event) for event in events]
+
+        entries = iter(entries)
+        return [
+            next(entries) if is_convertible else SRTWriter.format_event(event)
+            for event, is_convertible in zip(events, convertible, strict=True)
+        ]
+
+    def write_entry(self, entry: str) -> None:
+        """
+        Write a formatted SRT entry to the file, numbering it.
+
+        :param entry: The SRT entry, without the entry number.
+        """
+        self.fp.write(f"{self.line_number}\n{entry}")
+        self.line_number += 1
+
+    def write_events(self, events: list) -> None:
+        """
+        Write a list of events to the file, and flush the file.
+
+        :param events: A list of SSAEvent objects.
+        """
+        for entry in self.format_events(events):
+            # Events that cannot be represented in SRT are skipped by pysubs2
+            if entry:
+                self.write_entry(entry)
+
+        self.fp.flush()
+
+    @staticmethod
+    def read_entries(file_path: str) -> list:
+        """
+        Read the entries of an SRT file exactly as they were written, without
+        the entry numbers.
+
+        :param file_path: The path to the SRT file.
+        :return: A list of SRT entries.
+        """
+        # newline="" preserves the \r\n line breaks used within merged entries.
+        # The platform newline translation applied when the file was written is
+        # then undone, so the entries can be written back the same way.
+        with open(file_path, encoding="utf-8", newline="") as fp:
+            content = fp.read()
+        if os.linesep != "\n":
+            content = content.replace(os.linesep, "\n")
+
+        # Every entry starts with its number on a line followed by the timing
+        return SRT_ENTRY_NUMBER.split(content)[1:]
+
+
+class TranslationCache:
+    def __init__(self, db_path: str = CACHE_PATH):
+        """
+        Open (or create) a persistent translation cache backed by SQLite.
+
+        :param db_path: The path to the SQLite database, or ":memory:".
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tm "
+            "(hash BLOB PRIMARY KEY, src TEXT, tgt TEXT, output TEXT)"
+        )
+
+    @classmethod
+    def open(cls) -> "TranslationCache":
+        """
+        Open the on-disk translation cache. Falls back to an in-memory cache
+        if the on-disk cache cannot be opened, so translation still works.
+
+        :return: A TranslationCache object.
+        """
+        try:
+            return cls()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Unable to open translation cache: %s", e)
+            return cls(":memory:")
+
+    @staticmethod
+    def _make_key(src: str, tgt: str, text: str) -> bytes:
+        """
+        Generate the cache key for a piece of text.
+
+        :param src: The source language identifier.
+        :param tgt: The target language identifier.
+        :param text: The text to translate.
+        :return: The SHA-1 digest identifying the translation.
+        """
+        return hashlib.sha1(
+            f"{src}|{tgt}|{text}".encode(), usedforsecurity=False
+        ).digest()
+
+    def get_many(self, src: str, tgt: str, texts: list) -> list:
+        """
+        Look up the cached translations for multiple pieces of text.
+
+        :param src: The source language identifier.
+        :param tgt: The target language identifier.
+        :param texts: A list of texts to translate.
+        :return: A list of cached translations, with None for any text that
+                 is not cached.
+        """
+        keys = [self._make_key(src, tgt, text) for text in texts]
+        cached = {}
+
+        # Split the lookup into several queries to stay under the parameter limit
+        for i in range(0, len(keys), MAX_QUERY_PARAMETERS):
+            chunk = keys[i : i + MAX_QUERY_PARAMETERS]
+            placeholders = ",".join("?" * len(chunk))
+            cached.update(
+                self.connection.execute(
+                    f"SELECT hash, output FROM tm WHERE hash IN ({placeholders})",  # noqa: S608
+                    chunk,
+                )
+            )
+
+        return [cached.get(key) for key in keys]
+
+    def put_many(self, src: str, tgt: str, translations: list) -> None:
+        """
+        Store multiple translations in a single transaction.
+
+        :param src: The source language identifier.
+        :param tgt: The target language identifier.
+        :param translations: A list of (text, translated_text) tuples.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO tm (hash, src, tgt, output) VALUES (?,?,?,?)",
+                [
+                    (self._make_key(src, tgt, text), src, tgt, output)
+                    for text, output in translations
+                ],
+            )
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        self.connection.close()
+
 
 class SRTFile:
-    def __init__(self, file_path: str, subs: pysubs2.SSAFile = None):
+    def __init__(
+        self,
+        file_path: str,
+        subs: pysubs2.SSAFile = None,
+        language: str = None,
+        lazy: bool = False,
+    ):
         """
         Initialize an SRTFile object.
 
         :param file_path: The path to the SRT file.
         :param subs: Optional SSAFile object containing the subtitles.
+        :param language: Optional language identifier. If not provided, it is
+                         extracted from the file path.
+        :param lazy: Whether to delay loading the subtitles until they are used.
         """
         self.file_path = file_path
-        self.language = self._extract_language(file_path) if subs is None else None
-        self.subs = subs if subs is not None else pysubs2.load(file_path)
+        if language is not None:
+            self.language = language
+        else:
+            self.language = self._extract_language(file_path) if subs is None else None
+
+        # The path without the language and extension, used to generate the
+        # path of this file in other languages
+        suffix = f".{self.language}.srt"
+        self._stem = (
+            file_path[: -len(suffix)]
+            if self.language is not None and file_path.endswith(suffix)
+            else None
+        )
+
+        if subs is not None:
+            self.subs = subs
+        elif not lazy:
+            self.subs = self._load(file_path)
+
+    @functools.cached_property
+    def subs(self) -> pysubs2.SSAFile:
+        """
+        The subtitles, loaded from disk the first time they are used.
+
+        :return: An SSAFile object containing the subtitles.
+        """
+        return self._load(self.file_path)
+
+    @staticmethod
+    def _load(file_path: str) -> pysubs2.SSAFile:
+        """
+        Load the subtitles from an SRT file.
+
+        :param file_path: The path to the SRT file.
+        :return: An SSAFile object containing the subtitles.
+        """
+        subs = pysubs2.SSAFile()
+        subs.events = [
+            pysubs2.SSAEvent(start=start, end=end, text=text)
+            for start, end, text in zip(*_parse_srt(file_path), strict=True)
+        ]
+        return subs
 
     @staticmethod
     def _extract_language(file_path: str) -> str:
@@ -39,13 +639,20 @@ class SRTFile:
         :param file_path: The path to the SRT file.
         :return: A two-letter language identifier.
         """
-        match = re.search(r"\.([a-z]{2})\.srt$", file_path)
-        if match:
-            return match.group(1)
+        # Equivalent to matching r"\.([a-z]{2})\.srt$", without the regex
+        language = file_path[-6:-4]
+        if (
+            file_path.endswith(".srt")
+            and file_path[-7:-6] == "."
+            and language.isascii()
+            and language.isalpha()
+            and language.islower()
+        ):
+            return language
         raise ValueError("Unable to extract language from filename.")
 
     def generate_translated_subtitles(
-        self, target_language: str, write_to_disk: bool = True
+        self, target_language: str, write_to_disk: bool = True, jobs: int = 1
     ) -> "SRTFile":
         """
         Generate translated subtitles.
@@ -53,36 +660,58 @@ class SRTFile:
 
         :param target_language: The target language for translation.
         :param write_to_disk: Whether to write the translated subtitles to disk.
+        :param jobs: The number of files being translated at the same time.
         :return: A new SRTFile object containing the translated subtitles.
         """
-        max_characters = 5000  # Maximum characters for translation
-        text_blocks = self._create_text_blocks(max_characters)
-        translated_blocks = self._translate_text_blocks(text_blocks, target_language)
+        output_file = self.get_file_path_for_language(target_language)
+        partial_output_file = f"{output_file}.part"
 
         # Create a new SRTFile instance for the translated subtitles
-        translated_srt_file = SRTFile(
-            self.get_file_path_for_language(target_language), subs=pysubs2.SSAFile()
-        )
+        translated_srt_file = SRTFile(output_file, subs=pysubs2.SSAFile())
+
+        # The translated subtitles are written to disk as they are translated,
+        # and only moved into place once the translation is complete
+        try:
+            with (
+                open(partial_output_file, "w", encoding="utf-8", buffering=1 << 16)
+                if write_to_disk
+                else contextlib.nullcontext()
+            ) as output:
+                writer = SRTWriter(output) if output is not None else None
+
+                def append_events(translated_texts: list) -> None:
+                    # Create a new event for each translated event and add it
+                    # to the translated_srt_file
+                    new_events = []
+                    for translated_text in translated_texts:
+                        event = self.subs[len(translated_srt_file.subs)]
+                        new_event = pysubs2.SSAEvent()
+                        new_event.start = event.start
+                        new_event.end = event.end
+                        new_event.text = translated_text
+                        translated_srt_file.subs.append(new_event)
+                        new_events.append(new_event)
+
+                    if writer is not None:
+                        writer.write_events(new_events)
+
+                self._translate_events(
+                    target_language, on_translated=append_events, jobs=jobs
+                )
+
+            if write_to_disk:
+                os.replace(partial_output_file, output_file)
+        except BaseException:
+            # Don't leave the partially translated subtitles behind
+            if write_to_disk:
+                with contextlib.suppress(OSError):
+                    os.remove(partial_output_file)
+            raise
 
-        # Note that the translated blocks contain multiple events each,
-        # so translated_text is a string containing then entire file with each
-        # event separated by two newlines. We split the string on two newlines
-        # to get a list of events independently.
-        translated_text = "\n\n".join(translated_blocks)
-        translated_events = translated_text.strip().split("\n\n")
-
-        # Create a new event for each translated event and add it to the
-        # translated_srt_file
-        for i, event in enumerate(self.subs):
-            new_event = pysubs2.SSAEvent()
-            new_event.start = event.start
-            new_event.end = event.end
-            new_event.text = translated_events[i]
-            translated_srt_file.subs.append(new_event)
-
-        # Save the translated subtitles to disk
         if write_to_disk:
-            translated_srt_file.save(target_language)
+            # Use the saved subtitles from here on, so the translated events are
+            # the same as when the translated subtitles already exist
+            return SRTFile(output_file, language=target_language, lazy=True)
 
         return translated_srt_file
 
@@ -115,58 +744,340 @@ class SRTFile:
         # Save the merged subtitles to disk
         if write_to_disk:
             merged_srt_file.save(language_id)
+            self._save_manifest(
+                merged_srt_file.file_path, self._hash_events(translated_srt_file)
+            )
 
         return merged_srt_file
 
-    def _create_text_blocks(self, max_characters: int) -> list:
+    def update_merged_subtitles(
+        self, translated_srt_file: "SRTFile", language_id: str
+    ) -> int | None:
         """
-        Create text blocks for translation. Blocks are created by concatenating
-        events until the maximum number of characters is reached.
+        Update existing merged subtitles on disk. Only the events that changed
+        since the merged subtitles were generated are merged again, and the
+        remaining entries are copied from the existing file.
 
-        :param max_characters: The maximum number of characters in each block.
-        :return: A list of text blocks.
+        :param translated_srt_file: An SRTFile containing the translated subtitles.
+        :param language_id: The language identifier for the merged subtitles.
+        :return: The number of events that were merged again, or None if the
+                 merged subtitles have no manifest and cannot be updated.
         """
-        text_blocks = []
-        current_text_block = ""
-        separator = "\n\n"
+        merged_file_path = self.get_file_path_for_language(language_id)
+        manifest = self._load_manifest(merged_file_path)
+        if manifest is None:
+            return None
 
-        for event in self.subs:
-            if (
-                len(current_text_block) + len(event.text) + len(separator)
-                < max_characters
-            ):
-                current_text_block += event.text + separator
+        # Neither subtitle file changed since the manifest was saved, so there
+        # is no need to load them
+        if self._is_manifest_current(merged_file_path, translated_srt_file):
+            return 0
+
+        if len(self.subs) != len(translated_srt_file.subs):
+            raise ValueError(
+                "Subtitle files have different number of events; cannot merge."
+            )
+
+        event_hashes = self._hash_events(translated_srt_file)
+        changed_events = [
+            i
+            for i, event_hash in enumerate(event_hashes)
+            if manifest.get(str(i)) != event_hash
+        ]
+        if not changed_events and len(manifest) == len(event_hashes):
+            return 0
+
+        # If the number of events changed, or the existing file does not match
+        # the manifest, the existing entries cannot be reused
+        existing_entries = SRTWriter.read_entries(merged_file_path)
+        if len(manifest) != len(event_hashes) or len(existing_entries) != len(
+            event_hashes
+        ):
+            changed_events = list(range(len(event_hashes)))
+
+        merged_entries = iter(
+            SRTWriter.format_events(
+                self._create_merged_ssa_file(translated_srt_file, changed_events).events
+            )
+        )
+        changed_event_set = set(changed_events)
+
+        partial_file_path = f"{merged_file_path}.part"
+        try:
+            # Written with platform newlines, the same as pysubs2 saves the file
+            with open(partial_file_path, "w", encoding="utf-8") as fp:
+                writer = SRTWriter(fp)
+                for i in range(len(event_hashes)):
+                    if i in changed_event_set:
+                        entry = next(merged_entries)
+                    else:
+                        entry = existing_entries[i]
+                    if entry:
+                        writer.write_entry(entry)
+
+            os.replace(partial_file_path, merged_file_path)
+        except BaseException:
+            # Don't leave the partially written subtitles behind
+            with contextlib.suppress(OSError):
+                os.remove(partial_file_path)
+            raise
+
+        self._save_manifest(merged_file_path, event_hashes)
+
+        return len(changed_events)
+
+    def _hash_events(self, translated_srt_file: "SRTFile") -> list:
+        """
+        Hash the contents of every original and translated event pair, to
+        detect which merged events need to be generated again.
+
+        :param translated_srt_file: An SRTFile containing the translated subtitles.
+        :return: A list of hashes, one for each event.
+        """
+        return [
+            hashlib.sha1(
+                f"{original_event.start}|{original_event.end}|"
+                f"{original_event.text}|{translated_event.text}".encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+            for original_event, translated_event in zip(
+                self.subs, translated_srt_file.subs, strict=True
+            )
+        ]
+
+    def _is_manifest_current(
+        self, merged_file_path: str, translated_srt_file: "SRTFile"
+    ) -> bool:
+        """
+        Check whether the manifest was saved after the original and translated
+        subtitles were last modified, in which case the merged subtitles are
+        up to date.
+
+        :param merged_file_path: The path to the merged subtitles.
+        :param translated_srt_file: An SRTFile containing the translated subtitles.
+        :return: True if the manifest is newer than both subtitle files.
+        """
+        try:
+            manifest_mtime = os.stat(
+                self._get_manifest_path(merged_file_path)
+            ).st_mtime_ns
+            return (
+                manifest_mtime > os.stat(self.file_path).st_mtime_ns
+                and manifest_mtime > os.stat(translated_srt_file.file_path).st_mtime_ns
+            )
+        except OSError:
+            return False
+
+    @staticmethod
+    def _get_manifest_path(merged_file_path: str) -> str:
+        """
+        Get the path of the manifest stored next to the merged subtitles.
+
+        :param merged_file_path: The path to the merged subtitles.
+        :return: The path to the manifest.
+        """
+        return os.path.splitext(merged_file_path)[0] + MANIFEST_SUFFIX
+
+    def _load_manifest(self, merged_file_path: str) -> dict | None:
+        """
+        Load the manifest for the merged subtitles.
+
+        :param merged_file_path: The path to the merged subtitles.
+        :return: A dictionary mapping event indices to hashes, or None if the
+                 manifest does not exist or is invalid.
+        """
+        try:
+            with open(
+                self._get_manifest_path(merged_file_path), encoding="utf-8"
+            ) as fp:
+                manifest = json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+        return manifest if isinstance(manifest, dict) else None
+
+    def _save_manifest(self, merged_file_path: str, event_hashes: list) -> None:
+        """
+        Save the manifest for the merged subtitles.
+
+        :param merged_file_path: The path to the merged subtitles.
+        :param event_hashes: A list of hashes, one for each event.
+        """
+        manifest = {str(i): event_hash for i, event_hash in enumerate(event_hashes)}
+        with open(
+            self._get_manifest_path(merged_file_path), "w", encoding="utf-8"
+        ) as fp:
+            json.dump(manifest, fp)
+
+    def _translate_events(
+        self, target_language: str, on_translated=None, jobs: int = 1
+    ) -> list:
+        """
+        Translate the text of every event. Events that have been translated
+        before are read from the translation cache, and only the remaining
+        events are grouped into batches and sent for translation.
+
+        :param target_language: The target language for translation.
+        :param on_translated: Optional callback, called with lists of consecutive
+                              translated texts in event order, as soon as they
+                              are available.
+        :param jobs: The number of files being translated at the same time.
+        :return: A list of translated texts, one for each event.
+        """
+        max_characters = 5000  # Maximum characters for translation
+        texts = [event.text for event in self.subs]
+
+        cache = TranslationCache.open()
+        try:
+            translated_events = cache.get_many(self.language, target_language, texts)
+
+            needs_translation = self._find_untranslated_events(texts, translated_events)
+
+            # Index of the first event that has not been reported yet
+            next_index = 0
+
+            def report_translated() -> None:
+                nonlocal next_index
+                start = next_index
+                while (
+                    next_index < len(translated_events)
+                    and translated_events[next_index] is not None
+                ):
+                    next_index += 1
+                if on_translated is not None and next_index > start:
+                    on_translated(translated_events[start:next_index])
+
+            batches = (
+                self._create_batches(max_characters, needs_translation)
+                if needs_translation
+                else []
+            )
+            pending_batches = iter(batches)
+
+            def store_translated_batch(translated_batch: list) -> None:
+                indices = next(pending_batches)
+                for i, translated_text in zip(indices, translated_batch, strict=True):
+                    translated_events[i] = translated_text
+
+                # Store each batch as it completes, so progress is not lost
+                # if a later batch fails
+                cache.put_many(
+                    self.language,
+                    target_language,
+                    [(texts[i], translated_events[i]) for i in indices],
+                )
+                report_translated()
+
+            report_translated()
+            if batches:
+                self._translate_batches(
+                    [[texts[i] for i in batch] for batch in batches],
+                    target_language,
+                    on_translated=store_translated_batch,
+                    jobs=jobs,
+                )
+        finally:
+            cache.close()
+
+        return translated_events
+
+    @staticmethod
+    def _find_untranslated_events(texts: list, translated_events: list) -> list:
+        """
+        Find the events that still need to be translated. Events without any
+        text have nothing to translate, and are filled in with an empty string.
+
+        :param texts: A list of the text of every event.
+        :param translated_events: A list of translated texts, with None for any
+                                  event that has not been translated.
+        :return: A list of indices of the events that need to be translated.
+        """
+        needs_translation = []
+        for i, text in enumerate(texts):
+            if translated_events[i] is not None:
+                continue
+            if not text.strip():
+                translated_events[i] = ""
             else:
-                text_blocks.append(current_text_block)
-                current_text_block = event.text + separator
-        text_blocks.append(current_text_block)  # Add the last block
+                needs_translation.append(i)
+
+        return needs_translation
+
+    def _create_batches(self, max_characters: int, needs_translation: list) -> list:
+        """
+        Group events into batches for translation. Events are added to a batch
+        until the maximum number of characters is reached.
+
+        :param max_characters: The maximum number of characters in each batch.
+        :param needs_translation: Indices of the events to include in the batches.
+        :return: A list of batches, each containing a list of event indices.
+        """
+        batches = []
+        current_batch = []
+        current_length = 0
+
+        for i in needs_translation:
+            text_length = len(self.subs[i].text)
+            if current_batch and current_length + text_length > max_characters:
+                batches.append(current_batch)
+                current_batch = []
+                current_length = 0
+            current_batch.append(i)
+            current_length += text_length
+        # Add the last batch
+        if current_batch:
+            batches.append(current_batch)
 
-        return text_blocks
+        return batches
 
-    def _translate_text_blocks(self, text_blocks: list, target_language: str) -> list:
+    def _translate_batches(
+        self, batches: list, target_language: str, on_translated=None, jobs: int = 1
+    ) -> list:
         """
-        Translate a list of text blocks. The text blocks are concatenated
-        using _create_text_blocks(). Each block should be the maximum number
-        of characters that the translation API allows.
+        Translate a list of batches of texts. The batches are created using
+        _create_batches(). Each batch should be the maximum number of
+        characters that the translation API allows.
 
         Google Translator is currently limited to 5000 characters per request.
+        Batches are translated concurrently, with at most MAX_CONCURRENT_REQUESTS
+        requests in flight at once, shared between the files being translated
+        at the same time.
 
-        :param text_blocks: A list of text blocks.
+        :param batches: A list of batches, each containing a list of texts.
         :param target_language: The target language for translation.
-        :return: A list of translated text blocks.
+        :param on_translated: Optional callback, called with each translated
+                              batch in order, as soon as it is available.
+        :param jobs: The number of files being translated at the same time.
+        :return: A list of translated batches.
         """
-        translator = GoogleTranslator(source=self.language, target=target_language)
-        translated_blocks = []
 
-        for text_block in tqdm.tqdm(text_blocks, desc="Translating subtitles"):
-            # Temporarily replace \N with a unique marker
-            text_block_temp = text_block.replace("\\N", "--")
-            translated_text_temp = translator.translate(text=text_block_temp)
+        def restore_marker(translated_batch: list) -> list:
             # Replace the unique marker back with \N
-            translated_text = translated_text_temp.replace("--", "\\N")
-            translated_blocks.append(translated_text)
+            return [text.replace(LINE_BREAK_MARKER, "\\N") for text in translated_batch]
 
-        return translated_blocks
+        def handle_translated(translated_batch: list) -> None:
+            if on_translated is not None:
+                on_translated(restore_marker(translated_batch))
+
+        # Temporarily replace \N with a unique marker
+        marked_batches = [
+            [text.replace("\\N", LINE_BREAK_MARKER) for text in batch]
+            for batch in batches
+        ]
+        translated_marked_batches = asyncio.run(
+            _gather_translations(
+                marked_batches,
+                self.language,
+                target_language,
+                on_translated=handle_translated,
+                jobs=jobs,
+            )
+        )
+
+        return [
+            restore_marker(translated_batch)
+            for translated_batch in translated_marked_batches
+        ]
 
     def get_file_path_for_language(self, target_language: str) -> str:
         """
@@ -176,60 +1087,49 @@ class SRTFile:
         :param target_language: Target language identifier.
         :return: Path for the new SRT file in the given language.
         """
-        return self.file_path.replace(
-            f".{self.language}.srt", f".{target_language}.srt"
-        )
+        if self._stem is None:
+            return self.file_path
+        return f"{self._stem}.{target_language}.srt"
 
     def _create_merged_ssa_file(
-        self, translated_srt_file: "SRTFile"
+        self, translated_srt_file: "SRTFile", event_indices: list = None
     ) -> pysubs2.SSAFile:
         """
         Create a merged SSA file, by combining the events in the current SRTFile
         and the translated SRTFile.
 
         :param translated_srt_file: An SRTFile containing the translated subtitles.
+        :param event_indices: Optional indices of the events to merge. All events
+                              are merged by default.
         :return: A new SSAFile containing the merged subtitles.
         """
-        merged_ssa_file = pysubs2.SSAFile()
-
-        # Merge every event in the original and translated SRT files
-        for original_event, translated_event in zip(
-            self.subs, translated_srt_file.subs, strict=True
-        ):
-            original_lines = original_event.text.split("\\N")
+        original_events = self.subs.events
+        translated_events = translated_srt_file.subs.events
+        if event_indices is not None:
+            original_events = [original_events[i] for i in event_indices]
+            translated_events = [translated_events[i] for i in event_indices]
 
-            # Remove empty lines from translated_lines
-            translated_lines = [
-                line for line in translated_event.text.split("\\N") if line.strip()
-            ]
+        # Split every event into lines up front, so that the merge loop
+        # below only has to interleave the lines
+        original_lines = [event.text.split("\\N") for event in original_events]
+        # Remove empty lines from the translated lines
+        translated_lines = [
+            [line for line in event.text.split("\\N") if line.strip()]
+            for event in translated_events
+        ]
+        starts = [event.start for event in original_events]
+        ends = [event.end for event in original_events]
 
-            # Initialize an empty string to hold the final interleaved text
-            final_interleaved_text = ""
+        # Merge the lines of every event in the original and translated SRT files
+        merged_texts = interleave(original_lines, translated_lines)
 
-            # Check if the number of lines is the same in both texts
-            if len(original_lines) == len(translated_lines):
-                # If the line count is matched, interleave the lines
-                for original_line, translated_line in zip(
-                    original_lines, translated_lines, strict=True
-                ):
-                    # Note that pysubs2 won't generate the extra line break with a \n
-                    # only, which is why we use \r\n here
-                    final_interleaved_text += (
-                        f"{original_line}\n({translated_line})\r\n\r\n"
-                    )
-            else:
-                # If the line count is mismatched, list original lines first,
-                # then translated lines. \r\n is required for the extra line break.
-                final_interleaved_text += "\n".join(original_lines) + "\r\n\r\n"
-                final_interleaved_text += "\n".join(
-                    [f"({line})" for line in translated_lines]
-                )
-
-            # Create the new subtitle event and add it to the merged file
+        # Create the new subtitle events and add them to the merged file
+        merged_ssa_file = pysubs2.SSAFile()
+        for i, merged_text in enumerate(merged_texts):
             merged_event = pysubs2.SSAEvent()
-            merged_event.start = original_event.start
-            merged_event.end = original_event.end
-            merged_event.plaintext = final_interleaved_text
+            merged_event.start = starts[i]
+            merged_event.end = ends[i]
+            merged_event.plaintext = merged_text
             merged_ssa_file.append(merged_event)
 
         return merged_ssa_file
@@ -244,6 +1144,22 @@ class SRTFile:
         self.subs.save(output_file, format_="srt")
 
 
+def positive_int(value):
+    """
+    Parses a command-line argument that must be a positive integer.
+
+    :param value: The argument value.
+    :return: The argument value as an integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: '{value}'")
+    return number
+
+
 def parse_arguments():
     """
     Parses the command-line arguments.
@@ -279,6 +1195,13 @@ def parse_arguments():
         action="store_true",
         help="Force overwrite of existing dual language subtitles if they exist.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Number of files to process in parallel (default: 1).",
+    )
     return parser.parse_args()
 
 
@@ -286,28 +1209,42 @@ def get_filename(file_path):
     return os.path.basename(file_path)
 
 
-def process_file(input_file, target_language, translate_only, force):
+def get_file_stat(file_path):
+    try:
+        return os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+
+def process_file(input_file, target_language, translate_only, force, jobs=1):
     filename = get_filename(input_file)
     try:
-        srt_file = SRTFile(input_file)
+        # The subtitles are only parsed if they need to be translated or merged
+        srt_file = SRTFile(input_file, lazy=True)
 
         if srt_file.language == target_language:
             logger.warning(
-                f"Skipping {filename}: Target language '{target_language}' is the same as the "
-                f"source language '{srt_file.language}'. No work to perform."
+                "Skipping %s: Target language '%s' is the same as the "
+                "source language '%s'. No work to perform.",
+                filename,
+                target_language,
+                srt_file.language,
             )
             return
 
         # Check if translated subtitles already exist
         translated_file_path = srt_file.get_file_path_for_language(target_language)
         if os.path.exists(translated_file_path):
-            logger.info(f"{filename}: Translated subtitles already exist. Loading...")
-            translated_srt_file = SRTFile(translated_file_path)
+            logger.info("%s: Translated subtitles already exist. Loading...", filename)
+            # The translated subtitles are only parsed if they are merged
+            translated_srt_file = SRTFile(
+                translated_file_path, language=target_language, lazy=True
+            )
         # We need to generate the translated subtitle file
         else:
-            logger.info(f"{filename}: Generating translated subtitles...")
+            logger.info("%s: Generating translated subtitles...", filename)
             translated_srt_file = srt_file.generate_translated_subtitles(
-                target_language
+                target_language, jobs=jobs
             )
 
         # We are generating the dual language subtitles, not just translating
@@ -316,17 +1253,36 @@ def process_file(input_file, target_language, translate_only, force):
             language_id = f"{srt_file.language}-{target_language}"
             dual_lang_file_path = srt_file.get_file_path_for_language(language_id)
 
-            if os.path.exists(dual_lang_file_path) and not force:
-                logger.warning(
-                    f"Skipping {filename}: Dual language subtitles already exist."
+            # Only check the file system once for the dual language subtitles
+            dual_lang_file_stat = get_file_stat(dual_lang_file_path)
+
+            if dual_lang_file_stat is not None and not force:
+                # Only merge the events that changed since the dual language
+                # subtitles were generated
+                changed_event_count = srt_file.update_merged_subtitles(
+                    translated_srt_file, language_id
                 )
+                if changed_event_count is None:
+                    logger.warning(
+                        "Skipping %s: Dual language subtitles already exist.", filename
+                    )
+                elif changed_event_count == 0:
+                    logger.info("%s: Dual language subtitles are up to date.", filename)
+                else:
+                    logger.info(
+                        "%s: Updated %d events in the existing dual language "
+                        "subtitles.",
+                        filename,
+                        changed_event_count,
+                    )
                 return
-            elif os.path.exists(dual_lang_file_path) and force:
+            elif dual_lang_file_stat is not None and force:
                 logger.info(
-                    f"{filename}: Forcing overwrite of existing dual language subtitles."
+                    "%s: Forcing overwrite of existing dual language subtitles.",
+                    filename,
                 )
 
-            logger.info(f"{filename}: Generating dual language subtitles...")
+            logger.info("%s: Generating dual language subtitles...", filename)
 
             try:
                 # Merge the original srt_file and the translated_srt_file
@@ -334,14 +1290,16 @@ def process_file(input_file, target_language, translate_only, force):
                     translated_srt_file, language_id
                 )
                 logger.info(
-                    f"{filename}: Generated dual language subtitles: {get_filename(merged_srt_file.file_path)}."
+                    "%s: Generated dual language subtitles: %s.",
+                    filename,
+                    get_filename(merged_srt_file.file_path),
                 )
             # There was a mismatch in the number of events in the original and translated
             except ValueError as e:
-                logger.error(f"{filename}: {e}")
+                logger.error("%s: %s", filename, e)
 
     except Exception as e:
-        logger.error(f"Error processing {filename}: {e}")
+        logger.error("Error processing %s: %s", filename, e)
 
 
 def main():
@@ -353,8 +1311,31 @@ def main():
         )
         sys.exit(1)
 
-    for input_file in args.input_files:
-        process_file(input_file, args.target_language, args.translate_only, args.force)
+    jobs = min(args.jobs, len(args.input_files))
+    if jobs == 1:
+        for input_file in args.input_files:
+            process_file(
+                input_file, args.target_language, args.translate_only, args.force
+            )
+        return
+
+    # Each file is processed independently, so the files are processed in
+    # separate processes. Each process opens its own translation cache, and
+    # gets a share of the request budget.
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                process_file,
+                input_file,
+                args.target_language,
+                args.translate_only,
+                args.force,
+                jobs,
+            )
+            for input_file in args.input_files
+        ]
+        for future in futures:
+            future.result()
 
 
 if __name__ == "__main__":
@@ -1,10 +1,25 @@
-from setuptools import find_packages, setup
+from setuptools import Extension, find_packages, setup
+
+# The merge loop is compiled with Cython (a build requirement in
+# pyproject.toml). The extension is optional: if it cannot be built, llsub
+# falls back to the pure Python implementation.
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []
+else:
+    ext_modules = cythonize(
+        [Extension("llsub._merge", ["llsub/_merge.pyx"], optional=True)],
+        language_level=3,
+    )
 
 setup(
     name="llsub",
     version="0.1",
     packages=find_packages(),
-    install_requires=["pysubs2", "deep_translator", "tqdm"],
+    ext_modules=ext_modules,
+    # llsub uses the SubRip format and timestamp helpers inside pysubs2
+    install_requires=["aiohttp", "pysubs2>=1.6.1,<2", "tenacity", "tqdm"],
     entry_points={
         "console_scripts": [
             "llsub=llsub.llsub:main",
@@ -0,0 +1,140 @@
+import os
+
+import pysubs2
+import pytest
+
+from llsub import llsub
+from llsub.llsub import MANIFEST_SUFFIX, SRTFile, SRTWriter
+
+ORIGINAL = [
+    (1000, 2000, "Hej där\nHur mår du?"),
+    (3000, 4500, "Bra, tack"),
+    (5000, 6000, "<i>Hejdå</i>"),
+    (7000, 8000, "Vi ses\nimorgon\npå jobbet"),
+]
+TRANSLATED = [
+    (1000, 2000, "Hi there\nHow are you?"),
+    (3000, 4500, "Good, thanks"),
+    (5000, 6000, "<i>Goodbye</i>"),
+    (7000, 8000, "See you at work\ntomorrow"),
+]
+
+
+def write_srt(path, entries):
+    subs = pysubs2.SSAFile()
+    for start, end, text in entries:
+        subs.append(pysubs2.SSAEvent(start=start, end=end, text=text))
+    subs.save(str(path), format_="srt")
+
+
+def make_stale(path):
+    """Make the manifest older than the subtitles, so the events are hashed."""
+    os.utime(path.with_name(path.stem + MANIFEST_SUFFIX), ns=(0, 0))
+
+
+def update(directory):
+    """Update the merged subtitles the same way process_file does."""
+    srt_file = SRTFile(str(directory / "show.sv.srt"), lazy=True)
+    translated_srt_file = SRTFile(
+        str(directory / "show.en.srt"), language="en", lazy=True
+    )
+    return srt_file, srt_file.update_merged_subtitles(translated_srt_file, "sv-en")
+
+
+def regenerate(directory):
+    """Generate the merged subtitles from scratch, the same as --force."""
+    srt_file = SRTFile(str(directory / "show.sv.srt"))
+    translated_srt_file = SRTFile(str(directory / "show.en.srt"), language="en")
+    srt_file.generate_merged_subtitles(translated_srt_file, "sv-en")
+    return (directory / "show.sv-en.srt").read_bytes()
+
+
+@pytest.fixture
+def merged(tmp_path):
+    write_srt(tmp_path / "show.sv.srt", ORIGINAL)
+    write_srt(tmp_path / "show.en.srt", TRANSLATED)
+    regenerate(tmp_path)
+    return tmp_path / "show.sv-en.srt"
+
+
+def test_rerun_without_changes_skips_parsing(merged):
+    contents = merged.read_bytes()
+
+    srt_file, changed_event_count = update(merged.parent)
+
+    assert changed_event_count == 0
+    assert "subs" not in srt_file.__dict__
+    assert merged.read_bytes() == contents
+
+
+def test_rerun_without_changes_compares_hashes(merged):
+    contents = merged.read_bytes()
+    make_stale(merged)
+
+    _, changed_event_count = update(merged.parent)
+
+    assert changed_event_count == 0
+    assert merged.read_bytes() == contents
+
+
+def test_changed_event_is_merged_again(merged):
+    translated = list(TRANSLATED)
+    translated[2] = (5000, 6000, "<i>Bye now</i>")
+    write_srt(merged.parent / "show.en.srt", translated)
+    make_stale(merged)
+
+    _, changed_event_count = update(merged.parent)
+
+    assert changed_event_count == 1
+    patched = merged.read_bytes()
+    assert b"Bye now" in patched
+    assert regenerate(merged.parent) == patched
+
+
+def test_changed_event_count_merges_all_events(merged):
+    write_srt(merged.parent / "show.sv.srt", [*ORIGINAL, (9000, 9500, "Hej")])
+    write_srt(merged.parent / "show.en.srt", [*TRANSLATED, (9000, 9500, "Hi")])
+    make_stale(merged)
+
+    _, changed_event_count = update(merged.parent)
+
+    assert changed_event_count == len(ORIGINAL) + 1
+    patched = merged.read_bytes()
+    assert regenerate(merged.parent) == patched
+
+
+def test_missing_manifest_is_not_updated(merged):
+    contents = merged.read_bytes()
+    os.remove(merged.with_name(merged.stem + MANIFEST_SUFFIX))
+
+    _, changed_event_count = update(merged.parent)
+
+    assert changed_event_count is None
+    assert merged.read_bytes() == contents
+
+
+@pytest.mark.parametrize("manifest", ["{not json", "[]"])
+def test_corrupt_manifest_is_not_updated(merged, manifest):
+    contents = merged.read_bytes()
+    merged.with_name(merged.stem + MANIFEST_SUFFIX).write_text(manifest)
+
+    _, changed_event_count = update(merged.parent)
+
+    assert changed_event_count is None
+    assert merged.read_bytes() == contents
+
+
+def test_read_entries_undoes_platform_newlines(merged, monkeypatch):
+    entries = SRTWriter.read_entries(str(merged))
+    assert len(entries) == len(ORIGINAL)
+
+    # Simulate a merged file saved on Windows, where every \n is written as
+    # \r\n, including the \n in the \r\n line breaks within merged entries
+    windows_file = merged.with_name("windows.srt")
+    with open(windows_file, "w", encoding="utf-8", newline="\r\n") as fp:
+        writer = SRTWriter(fp)
+        for entry in entries:
+            writer.write_entry(entry)
+    monkeypatch.setattr(llsub.os, "linesep", "\r\n")
+
+    assert SRTWriter.read_entries(str(windows_file)) == entries
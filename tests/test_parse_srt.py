@@ -0,0 +1,98 @@
+import random
+
+import pysubs2
+import pytest
+
+from llsub.llsub import _parse_srt
+
+EDGE_CASES = {
+    "simple": "1\n00:00:01,000 --> 00:00:02,000\nHej\n\n",
+    "multiple lines": (
+        "1\n00:00:01,000 --> 00:00:02,000\nHej där\nHur mår du?\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nBra\n\n"
+    ),
+    "no arrow": "1\n00:00:01,000 00:00:02,000\nHej\n\n2\n0:0:3.5 to 0:0:4.25\nDå\n",
+    "extra timestamps": (
+        "1\n00:00:01,000 --> 00:00:02,000 00:00:03,000\nHej\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n00:00:05,000 --> 00:00:06,000 1:2:3,4\n"
+    ),
+    "empty entries": (
+        "1\n00:00:01,000 --> 00:00:02,000\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n \n\n"
+        "3\n00:00:05,000 --> 00:00:06,000\n"
+    ),
+    "number as text": (
+        "1\n00:00:01,000 --> 00:00:02,000\n12\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n\n٣\n\n"
+        "00:00:05,000 --> 00:00:06,000\n\n²\n"
+    ),
+    "crlf": "1\r\n00:00:01,000 --> 00:00:02,000\r\nHej\r\ndär\r\n\r\n2\r\n"
+    "00:00:03,000 --> 00:00:04,000\r\nBra\r\n",
+    "tags": (
+        "1\n00:00:01,000 --> 00:00:02,000\n<i>Hej</i> < b >där</ b>\n\n"
+        '2\n00:00:03,000 --> 00:00:04,000\n<font color="red">Bra</font> <u>x</u>\n'
+        "<s>y</s> a < b\n"
+    ),
+    "no numbers": (
+        "00:00:01,000 --> 00:00:02,000\nHej\n00:00:03,000 --> 00:00:04,000\nDå"
+    ),
+    "empty file": "",
+}
+# Chances of each variation in the randomly generated files
+NUMBER_CHANCE = 0.9
+EXTRA_TIMESTAMP_CHANCE = 0.1
+BLANK_LINE_CHANCE = 0.8
+CRLF_CHANCE = 0.2
+TEXT_LINES = [
+    "hej",
+    "<i>x</i>",
+    "",
+    " ",
+    "12",
+    "²",
+    "a -- b",
+    "<b >y</ b>",
+    "1:2:3,4 x",
+]
+
+
+def check_same_as_pysubs2(path, content):
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        fp.write(content)
+
+    expected = [
+        (event.start, event.end, event.text)
+        for event in pysubs2.load(str(path), format_="srt")
+    ]
+    assert list(zip(*_parse_srt(str(path)), strict=True)) == expected
+
+
+@pytest.mark.parametrize("content", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_parse_srt_edge_cases(tmp_path, content):
+    check_same_as_pysubs2(tmp_path / "edge.srt", content)
+
+
+def random_timestamp(rng):
+    return (
+        f"{rng.randint(0, 120)}:{rng.randint(0, 99):02d}:{rng.randint(0, 99)}"
+        f"{rng.choice(',.')}{rng.randint(0, 9999)}"
+    )
+
+
+def test_parse_srt_random_files(tmp_path):
+    rng = random.Random(7)
+    for _ in range(2000):
+        lines = []
+        for number in range(1, rng.randint(1, 6)):
+            if rng.random() < NUMBER_CHANCE:
+                lines.append(str(number))
+            separator = rng.choice([" --> ", "-->", " ", " to ", "|"])
+            timing_line = random_timestamp(rng) + separator + random_timestamp(rng)
+            if rng.random() < EXTRA_TIMESTAMP_CHANCE:
+                timing_line += " " + random_timestamp(rng)
+            lines.append(timing_line)
+            lines.extend(rng.choice(TEXT_LINES) for _ in range(rng.randint(0, 3)))
+            if rng.random() < BLANK_LINE_CHANCE:
+                lines.append("")
+        newline = "\r\n" if rng.random() < CRLF_CHANCE else "\n"
+        check_same_as_pysubs2(tmp_path / "random.srt", newline.join(lines))
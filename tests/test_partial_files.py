@@ -0,0 +1,73 @@
+import os
+
+import pysubs2
+import pytest
+
+from llsub import llsub
+from llsub.llsub import SRTFile, SRTWriter, TranslationCache
+
+# The translation request that fails
+FAILING_REQUEST = 3
+
+
+def write_srt(path, texts):
+    subs = pysubs2.SSAFile()
+    for i, text in enumerate(texts):
+        subs.append(pysubs2.SSAEvent(start=i * 1000, end=i * 1000 + 500, text=text))
+    subs.save(str(path), format_="srt")
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(
+        TranslationCache, "open", classmethod(lambda cls: cls(":memory:"))
+    )
+
+
+def test_failed_translation_removes_partial_file(tmp_path, monkeypatch):
+    # Long enough that the events are sent in several batches
+    write_srt(tmp_path / "show.sv.srt", [f"Rad {i} " * 100 for i in range(50)])
+    calls = []
+
+    async def translate_batch(session, limiter, texts, src, tgt):
+        calls.append(texts)
+        if len(calls) == FAILING_REQUEST:
+            raise RuntimeError("translation failed")
+        return [text.upper() for text in texts]
+
+    monkeypatch.setattr(llsub, "_translate_batch", translate_batch)
+
+    srt_file = SRTFile(str(tmp_path / "show.sv.srt"))
+    with pytest.raises(RuntimeError):
+        srt_file.generate_translated_subtitles("en")
+
+    assert len(calls) >= FAILING_REQUEST
+    assert sorted(os.listdir(tmp_path)) == ["show.sv.srt"]
+
+
+def test_failed_update_removes_partial_file(tmp_path, monkeypatch):
+    write_srt(tmp_path / "show.sv.srt", ["Hej", "Bra", "Hejdå"])
+    write_srt(tmp_path / "show.en.srt", ["Hi", "Good", "Goodbye"])
+    srt_file = SRTFile(str(tmp_path / "show.sv.srt"))
+    translated_srt_file = SRTFile(str(tmp_path / "show.en.srt"), language="en")
+    srt_file.generate_merged_subtitles(translated_srt_file, "sv-en")
+    merged = tmp_path / "show.sv-en.srt"
+    contents = merged.read_bytes()
+
+    # Change the number of events, so every entry is written again
+    write_srt(tmp_path / "show.sv.srt", ["Hej", "Bra", "Hejdå", "Ses"])
+    write_srt(tmp_path / "show.en.srt", ["Hi", "Good", "Goodbye", "Bye"])
+    os.utime(tmp_path / "show.sv-en.llsub-manifest.json", ns=(0, 0))
+
+    def write_entry(self, entry):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SRTWriter, "write_entry", write_entry)
+
+    srt_file = SRTFile(str(tmp_path / "show.sv.srt"))
+    translated_srt_file = SRTFile(str(tmp_path / "show.en.srt"), language="en")
+    with pytest.raises(OSError, match="disk full"):
+        srt_file.update_merged_subtitles(translated_srt_file, "sv-en")
+
+    assert not os.path.exists(f"{merged}.part")
+    assert merged.read_bytes() == contents
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from llsub.llsub import (
+    GOOGLE_TRANSLATE_URL,
+    LINE_BREAK_MARKER,
+    REQUEST_DELAY,
+    RequestLimiter,
+    _translate_batch,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+TEXTS = [f"Hej där{LINE_BREAK_MARKER}Hur mår du?", "Bra, tack", "Hejdå"]
+TRANSLATED_TEXTS = [
+    f"Hi there{LINE_BREAK_MARKER}How are you?",
+    "Good, thanks",
+    "Goodbye",
+]
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self, content_type="application/json"):
+        return self.data
+
+
+class FakeSession:
+    """Replays a saved response body for every request."""
+
+    def __init__(self, response_file):
+        with open(os.path.join(DATA_DIR, response_file), encoding="utf-8") as fp:
+            self.data = json.load(fp)
+        self.requests = []
+
+    def post(self, url, params=None, data=None):
+        self.requests.append((url, params, data))
+        return FakeResponse(self.data)
+
+
+def translate(session, texts):
+    return asyncio.run(
+        _translate_batch(session, RequestLimiter(1, 0), texts, "sv", "en")
+    )
+
+
+def test_request_sends_each_text_as_q_parameter():
+    session = FakeSession("translate_multiple.json")
+
+    translate(session, TEXTS)
+
+    ((url, params, data),) = session.requests
+    assert url == GOOGLE_TRANSLATE_URL
+    assert params == {"client": "gtx", "sl": "sv", "tl": "en", "format": "text"}
+    assert data == [("q", text) for text in TEXTS]
+
+
+@pytest.mark.parametrize(
+    "response_file", ["translate_multiple.json", "translate_detected_language.json"]
+)
+def test_multiple_translations_are_parsed_in_order(response_file):
+    assert translate(FakeSession(response_file), TEXTS) == TRANSLATED_TEXTS
+
+
+def test_single_translation_is_parsed():
+    assert translate(FakeSession("translate_single.json"), ["Hejdå"]) == ["Goodbye"]
+
+
+def test_translation_count_mismatch_is_rejected():
+    with pytest.raises(ValueError, match="different number of events"):
+        translate(FakeSession("translate_multiple.json"), TEXTS[:2])
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_shared_request_limiter_spaces_requests_by_jobs(jobs):
+    async def request_starts():
+        limiter = RequestLimiter.shared(jobs)
+        loop = asyncio.get_running_loop()
+        starts = []
+        for _ in range(3):
+            async with limiter:
+                starts.append(loop.time())
+        return starts
+
+    starts = asyncio.run(request_starts())
+
+    for previous, start in zip(starts, starts[1:], strict=False):
+        assert start - previous == pytest.approx(REQUEST_DELAY * jobs, abs=0.05)